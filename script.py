@@ -3,11 +3,18 @@
 # En-Ho Shen <enhoshen@gmail.com>, 2023
 
 import path
+import os
 import re
-from typing import List, Optional
-from dataclasses import dataclass
+import json
+import shlex
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
 import logging
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from functools import cached_property, lru_cache
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 import ffmpeg
@@ -15,64 +22,128 @@ import ffmpeg
 
 logger = logging.getLogger()
 
+# Filename patterns compiled once at import
+# basic name with the optional cut range lossless cut appends, groups are
+# name, date, time, 4 start and 4 end cut fields, and the rest. Matched with
+# fullmatch, the lazy name scans forward instead of backtracking from the end
+_BASIC_RE = re.compile(
+    r"(.*?) (\d{4}\.\d{2}\.\d{2}) - (\d{2}\.\d{2}\.\d{2})\.\d*\.DVR(?:\.mp4)?"
+    r"(?:-(\d{2})\.(\d{2})\.(\d{2})\.(\d{3})-(\d{2})\.(\d{2})\.(\d{2})\.(\d{3}))?"
+    r"(.*)"
+)
+# old shadowplay naming, space separated date and time
+_TEMP_RE = re.compile(r"(.*) (\d{4} \d{2} \d{2})   (\d{2} \d{2} \d*)")
+# script.sh words only sh can run: operators, expansions, globs and comments
+_SHELL_WORD_RE = re.compile(r"[$`*?\[]|^[#~]|^[();<>|&]+$")
+# start and end time of a cut, 4 groups each
+_CUT_FULL_RE = re.compile(
+    r"(\d{2})\.(\d{2})\.(\d{2})\.(\d{3})-(\d{2})\.(\d{2})\.(\d{2})\.(\d{3})"
+)
+
+
+def _mp4_duration(file: str) -> Optional[float]:
+    """
+    Duration in sec from the mvhd box of an mp4, None if it cannot be read
+    and ffprobe should be asked instead
+    """
+    try:
+        with open(file, "rb") as f:
+            pos = 0
+            end = os.fstat(f.fileno()).st_size
+            while pos + 8 <= end:
+                f.seek(pos)
+                size, box = struct.unpack(">I4s", f.read(8))
+                header = 8
+                if size == 1:
+                    (size,) = struct.unpack(">Q", f.read(8))
+                    header = 16
+                elif size == 0:
+                    size = end - pos
+                if size < header:
+                    return None
+                if box == b"moov":
+                    # descend into moov, mvhd is one of its children
+                    end = pos + size
+                    pos += header
+                    continue
+                if box == b"mvhd":
+                    version = f.read(4)[0]
+                    if version == 1:
+                        _, _, timescale, duration = struct.unpack(
+                            ">QQIQ", f.read(28)
+                        )
+                        unknown = 0xFFFFFFFFFFFFFFFF
+                    else:
+                        _, _, timescale, duration = struct.unpack(
+                            ">IIII", f.read(16)
+                        )
+                        unknown = 0xFFFFFFFF
+                    if timescale == 0 or duration in (0, unknown):
+                        return None
+                    return duration / timescale
+                pos += size
+    except (OSError, struct.error, IndexError):
+        pass
+    return None
+
 
-@dataclass
 class Time:
-    hr: int = 0
-    min: int = 0
-    sec: int = 0
-    msec: int = 0
+    """Helpers for time kept as an int count of msec"""
 
-    def __post_init__(self):
-        """support for init with str"""
-        self.hr = int(self.hr)
-        self.min = int(self.min)
-        self.sec = int(self.sec)
-        self.msec = int(self.msec)
+    @staticmethod
+    def from_strings(hr: str, min: str, sec: str, msec: str) -> int:
+        """msec from fields captured from a file name"""
+        msec = int(msec)
         # if msec is 4 digits
-        if self.msec >= 1000:
-            self.msec = int(self.msec // 10)
+        if msec >= 1000:
+            msec = msec // 10
+        return ((int(hr) * 3600 + int(min) * 60 + int(sec)) * 1000) + msec
+
+    @staticmethod
+    def from_sec(num: float) -> int:
+        return int(num * 1000)
+
+    @staticmethod
+    def to_str(ms: int) -> str:
+        """To the HH.MM.SS.mmmm form used in file names"""
+        hr, ms = divmod(ms, 3600000)
+        min, ms = divmod(ms, 60000)
+        sec, ms = divmod(ms, 1000)
+        return f"{hr:02}.{min:02}.{sec:02}.{ms:0<4}"
+
+    @staticmethod
+    def to_text(ms: int) -> str:
+        """To youtube chapter text"""
+        sec = ms // 1000
+        hr, sec = divmod(sec, 3600)
+        min, sec = divmod(sec, 60)
+        # %-format is about twice as fast as the f-string format specs here
+        return "%02d:%02d:%02d" % (hr, min, sec)
 
-    def __str__(self) -> str:
-        return f"{self.hr:02}.{self.min:02}.{self.sec:02}.{self.msec:0<4}"
 
-    def to_text(self) -> str:
-        """To youtube chapter text"""
-        return f"{self.hr:02}:{self.min:02}:{self.sec:02}"
-
-    def to_msec(self) -> int:
-        hr = self.hr * 3600
-        min = self.min * 60
-        sec = self.sec
-        msec = self.msec
-        return ((hr + min + sec) * 1000) + msec
-
-    def from_sec(self, num: float):
-        sec = int(num)
-        self.msec = int((num - sec) * 1000)
-        min = sec // 60
-        self.sec = sec % 60
-        self.hr = min // 60
-        self.min = min % 60
-        return self
-
-
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Cut:
-    start: Time
-    end: Time
+    # in msec
+    start: int
+    end: int
 
     def __str__(self):
-        return f"{self.start}-{self.end}"
+        return f"{Time.to_str(self.start)}-{Time.to_str(self.end)}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Chapter:
     name: str
     date: str
     time: str
-    length: Time
+    length_msec: int
     cut: Optional[Cut]
+    _title_line: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        """Pre-bake the chapter title shared by text and metadata"""
+        cut = "" if self.cut is None else " " + str(self.cut)
+        self._title_line = f"{self.date}-{self.time}{cut}"
 
     def to_text(self, start: int):
         """
@@ -81,10 +152,7 @@ class Chapter:
         start: int
             start time in msec, the end time of the previous chapter
         """
-        start = Time().from_sec(float(start / 1000))
-        cut = "" if self.cut is None else " " + str(self.cut)
-        s = f"{start.to_text()} {self.date}-{self.time}{cut}\n"
-        return s
+        return f"{Time.to_text(start)} {self._title_line}\n"
 
     def to_meta(self, start: int):
         """
@@ -93,23 +161,24 @@ class Chapter:
         start: int
             start time in msec, the end time of the previous chapter
         """
-        end = start + self.length.to_msec()
-        cut = "" if self.cut is None else " " + str(self.cut)
-        s = (
+        return (
             "[CHAPTER]\n"
-            f"TIMEBASE=1/1000\n"
+            "TIMEBASE=1/1000\n"
             f"START={start}\n"
-            f"END={end}\n"
-            f"title={self.date}-{self.time}{cut}\n"
+            f"END={start + self.length_msec}\n"
+            f"title={self._title_line}\n"
         )
-        return s
 
 
-@dataclass
+@dataclass(slots=True)
 class Clip:
     path: path.Path
-    probe: dict
     ch: Chapter
+    # file name, kept as path moves between folders
+    basename: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.basename = os.path.basename(str(self.path))
 
 
 class Clips:
@@ -120,14 +189,12 @@ class Clips:
 
     def accum(self):
         """Accumulate start time of each chapters in msec"""
-        lengths = [clip.ch.length.to_msec() for clip in self.clips]
-        starts = [0]
-        for i in lengths:
-            starts.append(starts[-1] + i)
-        return starts
+        lengths = (clip.ch.length_msec for clip in self.clips)
+        return list(accumulate(lengths, initial=0))
 
-    @property
+    @cached_property
     def title(self) -> str:
+        """Computed once, self.clips is not expected to change afterwards"""
         if len(self.clips) <= 0:
             return ""
         title = (
@@ -137,129 +204,258 @@ class Clips:
         )
         return title
 
-    def meta(self) -> List[str]:
-        starts = self.accum()
-        meta = [clip.ch.to_meta(start) for clip, start in zip(self.clips, starts)]
-        return meta
+    def iter_meta(self) -> Iterator[str]:
+        """Yield ffmpeg chapter metadata of each clip"""
+        for meta, _ in self.iter_chapters():
+            yield meta
+
+    def iter_text(self) -> Iterator[str]:
+        """Yield youtube chapter text of each clip"""
+        for _, text in self.iter_chapters():
+            yield text
 
-    def text(self) -> List[str]:
-        starts = self.accum()
-        text = [clip.ch.to_text(start) for clip, start in zip(self.clips, starts)]
-        return text
+    def iter_chapters(self) -> Iterator[Tuple[str, str]]:
+        """Yield (metadata, text) of each clip from a single running start"""
+        start = 0
+        for clip in self.clips:
+            yield clip.ch.to_meta(start), clip.ch.to_text(start)
+            start += clip.ch.length_msec
 
     def __iter__(self):
         for c in self.clips:
             yield c
 
     @property
-    def paths(self) -> str:
+    def paths(self) -> List[str]:
+        """Not cached, Output.move() and copy() update each clip path"""
         return [str(c.path) for c in self.clips]
 
 
 class Parser:
     """
     Parse file name produced by shadowplayer recording and lossless cut
-    program, and probe dictionary from ffmpeg.probe(), convert to struct
-    and output concated video with updated metadate containing chapter
-    information
+    program, and clip duration read from the mp4 header or probed by
+    ffprobe, convert to struct and output concated video with updated
+    metadate containing chapter information
     """
 
+    # at most this many ffprobe subprocesses run at once
+    max_probes = 32
+
+    def __init__(self, cache_path: Optional[str] = None):
+        """
+        Args:
+        cache_path: Optional[str]
+            json file caching probed durations keyed by (absolute path, mtime,
+            size), no caching if None
+        """
+        self.cache_path = None if cache_path is None else path.Path(cache_path)
+        self._cache = {}
+        # absolute paths passed to probe_all, the only entries saved
+        self._probed = set()
+        if self.cache_path is not None and self.cache_path.isfile():
+            try:
+                with open(self.cache_path) as file:
+                    self._cache = json.load(file)
+            except (OSError, ValueError):
+                logger.warning(f"discard unreadable probe cache {self.cache_path}")
+            if not isinstance(self._cache, dict):
+                logger.warning(f"discard malformed probe cache {self.cache_path}")
+                self._cache = {}
+
+    def save_cache(self) -> None:
+        """Write the cache, dropping entries of files no longer probed"""
+        if self.cache_path is None:
+            return
+        cache = {
+            file: entry for file, entry in self._cache.items()
+            if file in self._probed
+        }
+        try:
+            with open(self.cache_path, "w") as file:
+                json.dump(cache, file)
+        except OSError:
+            logger.warning(f"cannot write probe cache {self.cache_path}")
+
+    def _stat_key(self, file: str) -> Tuple[int, int]:
+        stat = os.stat(file)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _cached_probe(self, file: str, key: Tuple[int, int]) -> Optional[float]:
+        entry = self._cache.get(os.path.abspath(file))
+        try:
+            if (entry["mtime"], entry["size"]) != key:
+                return None
+            return float(entry["duration"])
+        except (KeyError, TypeError, ValueError):
+            # missing or malformed entry, probe again
+            return None
+
+    def _store_probe(self, file: str, key: Tuple[int, int], duration: float):
+        self._cache[os.path.abspath(file)] = {
+            "mtime": key[0], "size": key[1], "duration": duration,
+        }
+
+    def _spawn_probe(self, file: str) -> subprocess.Popen:
+        """Start ffprobe without waiting, only format.duration is requested"""
+        return subprocess.Popen(
+            [
+                "ffprobe", "-v", "error", "-show_entries", "format=duration",
+                "-of", "json", file,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def _collect_probe(self, proc: subprocess.Popen) -> float:
+        """Wait for ffprobe and return the duration in sec"""
+        out, err = proc.communicate()
+        if proc.returncode != 0:
+            raise ffmpeg.Error("ffprobe", out, err)
+        return float(json.loads(out)["format"]["duration"])
+
+    def probe(self, file: str) -> float:
+        """Probe duration in sec of a file, cached by stat"""
+        return self.probe_all([file])[file]
+
+    def probe_all(self, files: List[str]) -> Dict[str, float]:
+        """
+        Read durations from cache or the mp4 mvhd box, probe the rest with up
+        to max_probes ffprobe subprocesses running at once, collecting
+        outputs in spawn order
+        """
+        probes = {}
+        misses = []
+        for file in files:
+            self._probed.add(os.path.abspath(file))
+            key = self._stat_key(file)
+            duration = self._cached_probe(file, key)
+            if duration is None:
+                duration = _mp4_duration(file)
+                if duration is not None:
+                    self._store_probe(file, key, duration)
+            if duration is None:
+                misses.append((file, key))
+            else:
+                probes[file] = duration
+        for i in range(0, len(misses), self.max_probes):
+            procs = []
+            try:
+                for file, key in misses[i:i + self.max_probes]:
+                    procs.append((file, key, self._spawn_probe(file)))
+                while procs:
+                    file, key, proc = procs[0]
+                    probes[file] = self._collect_probe(proc)
+                    self._store_probe(file, key, probes[file])
+                    procs.pop(0)
+            finally:
+                # reap the rest of the batch if a probe failed
+                for _, _, proc in procs:
+                    proc.kill()
+                    proc.communicate()
+        return probes
+
     def files(self, base: path.Path):
-        files = base.listdir()
-        files = [path.Path(f) for f in files if re.match(r".*\.mp4$", str(f))]
+        with os.scandir(base) as entries:
+            files = [
+                path.Path(e.path) for e in entries
+                if e.name.endswith(".mp4") and e.is_file()
+            ]
         return files
 
     def clips(self, files: List[path.Path]) -> Clips:
-        clips = [self.parse(file) for file in files]
+        try:
+            probes = self.probe_all([str(file) for file in files])
+        finally:
+            # keep the durations probed so far even if one probe failed
+            self.save_cache()
+        clips = [self.parse(file, probes[str(file)]) for file in files]
         clips = [clip for clip in clips if clip is not None]
         return Clips(clips)
 
-    def basic_pattern(self) -> str:
-        """Return basic pattern strings"""
-        name = r"(.*)"
-        date = r"(\d{4}\.\d{2}\.\d{2})"
-        time = r"(\d{2}\.\d{2}\.\d{2})"
-        index = r"(\.\d*)"
-        filetype = r"(\.DVR(\.mp4)?)"
-        return rf"{name} {date} - {time}{index}{filetype}"
-
-    def temporary_pattern(self) -> str:
-        """Return old basic pattern strings"""
-        name = r"(.*)"
-        date = r"(\d{4} \d{2} \d{2})"
-        time = r"(\d{2} \d{2} \d*)"
-        #time = r"(\d{2} \d{2}})"
-        index = r"( \d*)"
-        #filetype = r"( DVR(\.mp4)?)"
-        filetype = r"(\.mp4)"
-        #return rf"{name} {date}   {time}{index}{filetype}"
-        return rf"{name} {date}   {time}"
-
-    def cut_pattern(self) -> str:
-        start = r"(\d{2}\.\d{2}\.\d{2}\.\d{3})"
-        end = r"(\d{2}\.\d{2}\.\d{2}\.\d{3})"
-        return rf"{start}-{end}"
-
-    def time_pattern(self) -> str:
-        return r"(\d{2})\.(\d{2})\.(\d{2})\.(\d{3})"
+    def parse_basic(
+        self, basename: str
+    ) -> Optional[Tuple[str, str, str, Optional[Cut]]]:
+        """
+        Match "<name> <date> - <time><index>.DVR[.mp4][-<start>-<end>]<rest>"
+        in one pass, return (name, date, time, cut), None if not a match
+        """
+        m = _BASIC_RE.fullmatch(basename)
+        if m is None:
+            return None
+        name, date, time, *cut, rest = m.groups()
+        if cut[0] is not None:
+            cut = Cut(
+                start=Time.from_strings(*cut[:4]),
+                end=Time.from_strings(*cut[4:]),
+            )
+        else:
+            # cut range not right after .DVR, if any
+            cut = self.parse_cut(rest) if rest else None
+        return name, date, time, cut
 
     def parse_cut(self, s: str) -> Optional[Cut]:
-        cut = None
-        if s != "":
-            start, end, *_ = re.split(self.cut_pattern(), s)[1:]
-            _, *start, _ = re.split(self.time_pattern(), start)
-            _, *end, _ = re.split(self.time_pattern(), end)
-            cut = Cut(start=Time(*start), end=Time(*end))
-        return cut
-
-    def parse(self, file: path.Path) -> Optional[Clip]:
-        """Parse file name to Clip"""
-        # discard first element which is an empty string
-        probe = ffmpeg.probe(file)
-        no_match = False
-        try:
-            name, date, time, index, DVR, mp4, rest = re.split(
-                self.basic_pattern(), str(file.basename())
-            )[1:]
-            cut = self.parse_cut(rest)
-        except ValueError:
-            no_match = True
-
-
-        try:
-            #name, date, time, index, DVR, mp4, rest = re.split(
-            name, date, time, rest = re.split(
-                self.temporary_pattern(), str(file.basename())
-            )[1:]
-            no_match = False
-            cut = ""
-        except ValueError:
-            pass
+        """Parse "<start>-<end>" appended by lossless cut anywhere in s"""
+        m = _CUT_FULL_RE.search(s)
+        if m is None:
+            return None
+        return Cut(
+            start=Time.from_strings(*m.group(1, 2, 3, 4)),
+            end=Time.from_strings(*m.group(5, 6, 7, 8)),
+        )
 
-        if no_match:
+    def parse(
+        self, file: path.Path, duration: Optional[float] = None
+    ) -> Optional[Clip]:
+        """Parse file name to Clip, probe the file if duration is not given"""
+        file_str = str(file)
+        basename = os.path.basename(file_str)
+        if duration is None:
+            duration = self.probe(file_str)
+        basic = self.parse_basic(basename)
+        if basic is not None:
+            name, date, time, cut = basic
+        elif (temp := _TEMP_RE.match(basename)) is not None:
+            name, date, time = temp.groups()
+            cut = None
+        else:
             logger.warning(f"{file} is not a match")
             return None
 
-
-        # length is in sec
-        length: float = float(probe["format"]["duration"])
         chapter = Chapter(
             name=name,
             date=date,
             time=time,
-            length=Time().from_sec(length),
+            length_msec=Time.from_sec(duration),
             cut=cut,
         )
-        clip = Clip(path=file, probe=probe, ch=chapter)
+        clip = Clip(path=file, ch=chapter)
         return clip
 
-@dataclass
+
+@lru_cache(maxsize=None)
+def _jinja_env(template_path: str) -> Environment:
+    """
+    One Environment per template folder, jinja keeps its own compiled
+    template cache and reloads a template when its file changes
+    """
+    return Environment(
+        loader=FileSystemLoader(template_path),
+        trim_blocks=True,
+        autoescape=select_autoescape(),
+    )
+
+
+@dataclass(slots=True)
 class CompressionConfig:
     enable: bool = False
     bitrate: int = 0
 
 
 class Output:
+    # at most this many clips are copied or moved across devices at once
+    max_transfers = 8
+
     def __init__(
         self,
         clips: Clips,
@@ -277,7 +473,7 @@ class Output:
         )
         self.template_name = (
             "ffmpeg_command.sh.jinja" if template_path is None
-            else self.template_path.basename()
+            else str(path.Path(template_path).basename())
         )
         self.out_dir = self.base if out_dir is None else path.Path(out_dir)
         self.out_dir = self.out_dir.joinpath(self.clips.title)
@@ -286,57 +482,130 @@ class Output:
         self.text_path = self.out_dir.joinpath("chapter.txt")
         self.script_path = self.out_dir.joinpath(f"script.sh")
         self.output_path = self.out_dir.joinpath(f"{self.clips.title}.mp4")
-        try:
-            self.out_dir.mkdir(mode=711)
-        except FileExistsError:
-            pass
+        self.out_dir.mkdir_p(mode=0o711)
 
     def inputs(self) -> None:
-        with open(self.input_path, "w") as file:
-            for c in self.clips:
-                file.write(f"file '{c.path.basename()}'\n")
+        with open(self.input_path, "w", buffering=1 << 16) as file:
+            file.writelines(f"file '{c.basename}'\n" for c in self.clips)
 
     def meta(self) -> None:
-        with open(self.meta_path, "w") as file:
+        with open(self.meta_path, "w", buffering=1 << 16) as file:
             file.write(f"title={self.clips.title}\n")
-            meta = self.clips.meta()
-            file.write("".join(meta))
+            file.writelines(self.clips.iter_meta())
 
     def text(self) -> None:
-        with open(self.text_path, "w") as file:
+        with open(self.text_path, "w", buffering=1 << 16) as file:
             file.write(f"{self.clips.title}\n")
-            text = self.clips.text()
-            file.write("".join(text))
+            file.writelines(self.clips.iter_text())
+
+    def chapters(self) -> None:
+        """Write both meta() and text() outputs in one walk over the clips"""
+        with (
+            open(self.meta_path, "w", buffering=1 << 16) as meta,
+            open(self.text_path, "w", buffering=1 << 16) as text,
+        ):
+            meta.write(f"title={self.clips.title}\n")
+            text.write(f"{self.clips.title}\n")
+            for chapter_meta, chapter_text in self.clips.iter_chapters():
+                meta.write(chapter_meta)
+                text.write(chapter_text)
+
+    def render_script(self) -> str:
+        tmpl = _jinja_env(str(self.template_path)).get_template(self.template_name)
+        return tmpl.render(output=self)
 
     def script(self):
-        env = Environment(
-            loader=FileSystemLoader(self.template_path),
-            trim_blocks=True,
-            autoescape=select_autoescape(),
-        )
-        tmpl = env.get_template(self.template_name)
         with open(self.script_path, "w") as file:
-            file.write(tmpl.render(output=self))
+            file.write(self.render_script())
+
+    def argv(self) -> Optional[List[str]]:
+        """
+        script.sh as an argument list to exec without a shell, with progress
+        reporting added, None unless it holds a single plain ffmpeg command
+        """
+        with open(self.script_path) as file:
+            lines = file.read().replace("\\\n", " ").splitlines()
+        commands = [
+            line for line in lines
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+        if len(commands) != 1:
+            return None
+        lexer = shlex.shlex(commands[0], posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        lexer.commenters = ""
+        try:
+            argv = list(lexer)
+        except ValueError:
+            # unbalanced quotes
+            return None
+        if os.path.basename(argv[0]) != "ffmpeg":
+            # env assignments or another program
+            return None
+        if any(_SHELL_WORD_RE.search(arg) for arg in argv):
+            return None
+        # global options, report progress on stdout for progress() to read
+        argv[1:1] = ["-progress", "pipe:1", "-nostats"]
+        return argv
+
+    def _dst(self, c: Clip) -> str:
+        return os.path.join(self.out_dir, c.basename)
+
+    def _move_one(self, c: Clip) -> None:
+        c.path = path.Path(c.path.move(self._dst(c)))
+
+    def _copy_one(self, c: Clip) -> None:
+        c.path = path.Path(c.path.copy(self._dst(c)))
 
     def move(self):
-        for c in self.clips:
-            c.path = c.path.move(self.out_dir.joinpath(c.path.basename()))
+        out_dev = os.stat(self.out_dir).st_dev
+        if all(os.stat(c.path).st_dev == out_dev for c in self.clips):
+            # same device moves are renames, nothing to gain from threads
+            for c in self.clips:
+                self._move_one(c)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_transfers) as pool:
+            list(pool.map(self._move_one, self.clips))
 
     def copy(self):
-        for c in self.clips:
-            c.path = c.path.copy(self.out_dir.joinpath(c.path.basename()))
+        with ThreadPoolExecutor(max_workers=self.max_transfers) as pool:
+            list(pool.map(self._copy_one, self.clips))
 
     def project(self):
         self.inputs()
-        self.meta()
-        self.text()
+        self.chapters()
         self.script()
 
-    def run(self):
-        subprocess.run(
-            args=['sh', 'script.sh'],
+    def progress(self, direct: bool = True) -> Iterator[int]:
+        """
+        Run script.sh and yield the concated length in msec each time ffmpeg
+        reports progress on stdout
+        Args:
+        direct: bool
+            exec the command from argv() without a shell, falls back to
+            sh script.sh, which reports no progress, when argv() is None
+        """
+        argv = self.argv() if direct else None
+        proc = subprocess.Popen(
+            args=['sh', 'script.sh'] if argv is None else argv,
             cwd=self.out_dir,
+            stdout=None if argv is None else subprocess.PIPE,
+            text=True,
         )
+        with proc:
+            for line in proc.stdout or ():
+                # out_time_ms is in usec despite the name
+                key, _, value = line.rstrip().partition("=")
+                if key == "out_time_ms" and value.isdecimal():
+                    yield int(value) // 1000
+        if proc.returncode != 0:
+            logger.warning(f"ffmpeg concat exited with {proc.returncode}")
+
+    def run(self, direct: bool = True):
+        total = Time.to_text(self.clips.accum()[-1])
+        for msec in self.progress(direct):
+            print(f"\r{Time.to_text(msec)} / {total}", end="", flush=True)
+        print()
 
 
 class Test:
@@ -360,9 +629,9 @@ class Interactive:
         )
 
     def read(self, base: Optional[str]=None) -> Output:
-        parser = Parser()
         if base is None:
             base = self.args.base
+        parser = Parser(cache_path=path.Path(base).joinpath(".probe_cache.json"))
         
         files = parser.files(path.Path(base))
         clips = parser.clips(files)